@@ -26,12 +26,25 @@ def create_app(config_name=None):
     else:
         app.config['SQLALCHEMY_DATABASE_URI'] = config[config_name].get_database_url()
     
+    # Size the connection pool for Azure SQL
+    if 'mssql' in app.config['SQLALCHEMY_DATABASE_URI']:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **app.config['SQLALCHEMY_ENGINE_OPTIONS'],
+            **app.config['MSSQL_POOL_OPTIONS']
+        }
+    
     # Print database info for debugging
     print("Connected to Azure SQL Database")
     
     # Initialize extensions
     init_db(app)
     
+    # Pre-warm the languages cache so the first request never waits on the API
+    # (skipped under test so the translator is only initialized when a test uses it)
+    if not app.config.get('TESTING'):
+        from services.translator import translator_service
+        translator_service.load_languages_cache()
+    
     # Register blueprints
     register_blueprints(app)
     
@@ -42,4 +55,4 @@ def create_app(config_name=None):
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -3,25 +3,80 @@ Configuration module for PLM Translator application.
 Handles database connections, environment variables, and app settings.
 """
 import os
+import functools
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables from .env once per process tree.
+# Azure App Service provides settings as real env vars, so .env is skipped there;
+# set SKIP_DOTENV to opt out elsewhere.
+if not (os.environ.get('_DOTENV_LOADED') or os.environ.get('WEBSITE_SITE_NAME') or os.environ.get('SKIP_DOTENV')):
+    load_dotenv()
+    os.environ['_DOTENV_LOADED'] = '1'
+
+
+@functools.cache
+def _build_database_url():
+    """Build the database URL from environment variables (computed once per process)"""
+    
+    # Check if running on Azure App Service
+    is_azure_app_service = os.environ.get('WEBSITE_SITE_NAME') is not None
+    
+    if is_azure_app_service:
+        # Azure App Service - check for connection string
+        azure_conn_str = os.environ.get('SQLAZURECONNSTR_DefaultConnection')
+        if azure_conn_str:
+            print("Using Azure App Service SQL connection string")
+            return azure_conn_str
+    
+    # Check if explicit DATABASE_URL is provided
+    if os.environ.get('DATABASE_URL'):
+        database_url = os.environ.get('DATABASE_URL')
+        print(f"Using database: {database_url.split('://')[0]}")
+        return database_url
+    
+    # Check if Azure SQL Database components are provided
+    azure_server = os.environ.get('AZURE_SQL_SERVER')
+    azure_database = os.environ.get('AZURE_SQL_DATABASE')
+    azure_username = os.environ.get('AZURE_SQL_USERNAME')
+    azure_password = os.environ.get('AZURE_SQL_PASSWORD')
+    
+    if all([azure_server, azure_database, azure_username, azure_password]):
+        # Build Azure SQL connection string with proper Unicode encoding
+        encoded_username = quote_plus(azure_username)
+        encoded_password = quote_plus(azure_password)
+        print("Using Azure SQL Database")
+        return f"mssql+pyodbc://{encoded_username}:{encoded_password}@{azure_server}/{azure_database}?driver=ODBC+Driver+17+for+SQL+Server&Encrypt=yes&TrustServerCertificate=no&Connection+Timeout=30&charset=utf8"
+    
+    # If no Azure SQL configuration is found, raise an error
+    raise ValueError("Azure SQL Database configuration not found. Please set the required environment variables: AZURE_SQL_SERVER, AZURE_SQL_DATABASE, AZURE_SQL_USERNAME, AZURE_SQL_PASSWORD")
 
 
 class Config:
     """Base configuration class"""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-here')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_RECORD_QUERIES = False  # Avoid per-query tracking overhead even under DEBUG
     JSON_AS_ASCII = False  # Ensure JSON responses support Unicode
     
     # Configure SQLAlchemy engine with proper encoding
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,
-        'pool_recycle': 300,
+        'pool_recycle': 1800,
         'echo': False
     }
+    
+    # Pool sizing for Azure SQL, applied only to mssql URLs (SQLite uses pools that reject these)
+    # Keep a warm pool of authenticated connections - Azure SQL handshakes are expensive
+    MSSQL_POOL_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+        # Bind multi-row inserts as pyodbc parameter arrays (also turns off insertmanyvalues).
+        # NVARCHAR(MAX) values (observation, translated texts) are buffered per batch at the
+        # size of the largest value, so very large texts increase memory use.
+        'fast_executemany': True
+    }
 
 
 class ProductionConfig(Config):
@@ -31,43 +86,13 @@ class ProductionConfig(Config):
     @staticmethod
     def get_database_url():
         """Get Azure SQL Database URL from environment variables"""
-        
-        # Check if running on Azure App Service
-        is_azure_app_service = os.environ.get('WEBSITE_SITE_NAME') is not None
-        
-        if is_azure_app_service:
-            # Azure App Service - check for connection string
-            azure_conn_str = os.environ.get('SQLAZURECONNSTR_DefaultConnection')
-            if azure_conn_str:
-                print("Using Azure App Service SQL connection string")
-                return azure_conn_str
-        
-        # Check if explicit DATABASE_URL is provided
-        if os.environ.get('DATABASE_URL'):
-            database_url = os.environ.get('DATABASE_URL')
-            print(f"Using database: {database_url.split('://')[0]}")
-            return database_url
-        
-        # Check if Azure SQL Database components are provided
-        azure_server = os.environ.get('AZURE_SQL_SERVER')
-        azure_database = os.environ.get('AZURE_SQL_DATABASE')
-        azure_username = os.environ.get('AZURE_SQL_USERNAME')
-        azure_password = os.environ.get('AZURE_SQL_PASSWORD')
-        
-        if all([azure_server, azure_database, azure_username, azure_password]):
-            # Build Azure SQL connection string with proper Unicode encoding
-            encoded_username = quote_plus(azure_username)
-            encoded_password = quote_plus(azure_password)
-            print("Using Azure SQL Database")
-            return f"mssql+pyodbc://{encoded_username}:{encoded_password}@{azure_server}/{azure_database}?driver=ODBC+Driver+17+for+SQL+Server&Encrypt=yes&TrustServerCertificate=no&Connection+Timeout=30&charset=utf8"
-        
-        # If no Azure SQL configuration is found, raise an error
-        raise ValueError("Azure SQL Database configuration not found. Please set the required environment variables: AZURE_SQL_SERVER, AZURE_SQL_DATABASE, AZURE_SQL_USERNAME, AZURE_SQL_PASSWORD")
+        return _build_database_url()
 
 
 class DevelopmentConfig(Config):
     """Development configuration"""
-    DEBUG = True
+    # Only enable debug when explicitly requested, in case this config is deployed by default
+    DEBUG = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
     
     @staticmethod
     def get_database_url():
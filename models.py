@@ -26,6 +26,11 @@ class TestResult(db.Model):
     session_id = db.Column(db.String(100), nullable=True)  # Session identifier
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # When created
     
+    __table_args__ = (
+        # Supports the most-recent-first ordering used by listing and pagination
+        db.Index('ix_test_results_created_at', created_at.desc()),
+    )
+    
     def to_dict(self):
         """Convert model to dictionary for JSON serialization"""
         return {
@@ -42,6 +47,14 @@ class TestResult(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
+    @staticmethod
+    def row_to_dict(row):
+        """Convert a Core result row mapping to the same shape as to_dict"""
+        data = dict(row)
+        created_at = data.get('created_at')
+        data['created_at'] = created_at.isoformat() if created_at else None
+        return data
+    
     def __repr__(self):
         return f'<TestResult {self.id}: {self.outcome}>'
 
@@ -57,6 +70,10 @@ def init_db(app):
             
             # Create tables (this will create new ones or skip existing)
             db.create_all()
+            
+            # create_all skips indexes on existing tables, so add any missing ones
+            for index in TestResult.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
             print("Database tables created/updated successfully!")
         except Exception as e:
             print(f"Database initialization error: {e}")
@@ -65,27 +82,35 @@ def init_db(app):
             print("Database tables created successfully!")
 
 
+# Columns that must be NVARCHAR(MAX) to store Unicode text on SQL Server
+UNICODE_COLUMNS = ('observation', 'text_to_translate', 'translated_text')
+
+
 def update_database_for_unicode(app):
     """Update existing database columns to support Unicode properly"""
     try:
         # Check if we're using SQL Server/Azure SQL
         if 'mssql' in app.config['SQLALCHEMY_DATABASE_URI']:
-            print("Updating database for Unicode support...")
-            
             # Execute raw SQL to alter columns for Unicode support
             with db.engine.connect() as conn:
                 # Start a transaction
                 trans = conn.begin()
                 try:
-                    # Check if table exists and has data
-                    result = conn.execute(db.text("SELECT COUNT(*) as count FROM test_results")).fetchone()
-                    if result and result[0] > 0:
-                        print(f"Found {result[0]} existing records. Updating columns...")
+                    # Only touch columns that are not already NVARCHAR - avoids DDL on every boot
+                    rows = conn.execute(db.text(
+                        "SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS "
+                        "WHERE TABLE_SCHEMA = SCHEMA_NAME() AND TABLE_NAME = 'test_results'"
+                    )).fetchall()
+                    column_types = {row[0]: row[1].lower() for row in rows}
+                    pending = [column for column in UNICODE_COLUMNS
+                               if column in column_types and column_types[column] != 'nvarchar']
+                    
+                    if pending:
+                        print("Updating database for Unicode support...")
                         
                         # Alter columns to NVARCHAR for Unicode support
-                        conn.execute(db.text("ALTER TABLE test_results ALTER COLUMN observation NVARCHAR(MAX)"))
-                        conn.execute(db.text("ALTER TABLE test_results ALTER COLUMN text_to_translate NVARCHAR(MAX)"))
-                        conn.execute(db.text("ALTER TABLE test_results ALTER COLUMN translated_text NVARCHAR(MAX)"))
+                        for column in pending:
+                            conn.execute(db.text(f"ALTER TABLE test_results ALTER COLUMN {column} NVARCHAR(MAX)"))
                         
                         print("Database columns updated for Unicode support!")
                     
@@ -96,4 +121,4 @@ def update_database_for_unicode(app):
                     print("Creating tables with Unicode support...")
                     
     except Exception as e:
-        print(f"Database update check failed: {e}")
\ No newline at end of file
+        print(f"Database update check failed: {e}")
@@ -2,12 +2,14 @@
 API routes for PLM Translator application.
 Handles REST API endpoints for translation, test results, and data management.
 """
+import math
 import uuid
+import functools
 from datetime import datetime, timezone
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, send_file
+from sqlalchemy import select, func, and_, or_, cast, literal
 from models import db, TestResult
-from services.translator import translator_service
-from utils import unicode_safe_jsonify, get_user_info
+from utils import unicode_safe_jsonify, get_user_info, validate_test_result_data
 
 api_bp = Blueprint('api', __name__)
 
@@ -15,8 +17,10 @@ api_bp = Blueprint('api', __name__)
 @api_bp.route('/languages')
 def get_languages():
     """API endpoint to get supported languages"""
+    from services.translator import translator_service
+    
     languages = translator_service.get_supported_languages()
-    return jsonify({
+    return unicode_safe_jsonify({
         'success': True,
         'languages': languages
     })
@@ -28,35 +32,36 @@ def translate():
     data = request.get_json()
     
     if not data:
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': 'No data provided'
-        }), 400
+        }, 400)
     
     source_text = data.get('text', '').strip()
     target_language = data.get('target_language', '').strip()
     
     # Validation
     if not source_text:
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': 'Please enter text to translate'
-        }), 400
+        }, 400)
     
     if not target_language:
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': 'Please select a target language'
-        }), 400
+        }, 400)
     
     if len(source_text) > 5000:
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': 'Text is too long. Maximum 5000 characters allowed.'
-        }), 400
+        }, 400)
     
     # Perform translation
-    result = translator_service.translate_text(source_text, target_language)
+    from services.translator import batching_translator
+    result = batching_translator.translate_text(source_text, target_language)
     
     if result['success']:
         return unicode_safe_jsonify(result)
@@ -67,20 +72,21 @@ def translate():
 @api_bp.route('/azure-user')
 def get_azure_user():
     """API endpoint to get current user information"""
+    timestamp = datetime.now(timezone.utc).isoformat()
     try:
         user_info = get_user_info()
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': True,
             **user_info,
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': timestamp
         })
     except Exception as e:
         # Fallback to a generic user
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': True,
             'user': 'Current User',
             'error': f'Limited user info: {str(e)}',
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'timestamp': timestamp
         })
 
 
@@ -91,37 +97,41 @@ def save_test_results():
         data = request.get_json()
         
         if not data:
-            return jsonify({
+            return unicode_safe_jsonify({
                 'success': False,
                 'error': 'No data provided'
-            }), 400
+            }, 400)
+        
+        # An array of results is saved in a single bulk insert
+        if isinstance(data, list):
+            return _save_test_results_batch(data)
         
         # Validate required fields
         if not data.get('outcome'):
-            return jsonify({
+            return unicode_safe_jsonify({
                 'success': False,
                 'error': 'Outcome is required'
-            }), 400
+            }, 400)
         
         # Validate accuracy field
         if not data.get('accuracy'):
-            return jsonify({
+            return unicode_safe_jsonify({
                 'success': False,
                 'error': 'Accuracy is required'
-            }), 400
+            }, 400)
         
         try:
             accuracy = float(data.get('accuracy'))
             if accuracy < 0 or accuracy > 100:
-                return jsonify({
+                return unicode_safe_jsonify({
                     'success': False,
                     'error': 'Accuracy must be between 0 and 100'
-                }), 400
+                }, 400)
         except (ValueError, TypeError):
-            return jsonify({
+            return unicode_safe_jsonify({
                 'success': False,
                 'error': 'Accuracy must be a valid number'
-            }), 400
+            }, 400)
         
         # Create new test result record
         test_result = TestResult(
@@ -133,32 +143,75 @@ def save_test_results():
             translated_text=data.get('translatedText'),
             source_language=data.get('sourceLanguage', 'auto'),
             target_language=data.get('targetLanguage'),
-            session_id=data.get('sessionId', str(uuid.uuid4()))
+            session_id=data['sessionId'] if 'sessionId' in data else str(uuid.uuid4())
         )
         
-        # Save to database
+        # Save to database - flush first so the response is built before commit
+        # expires the instance (id comes back from the INSERT, created_at is set in Python)
         db.session.add(test_result)
-        db.session.commit()
-        
-        return jsonify({
+        db.session.flush()
+        response_data = {
             'success': True,
             'message': 'Test results saved successfully to database',
             'result_id': test_result.id,
             'data': test_result.to_dict()
-        })
+        }
+        db.session.commit()
+        
+        return unicode_safe_jsonify(response_data)
         
     except ValueError as e:
         db.session.rollback()
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': f'Invalid data format: {str(e)}'
-        }), 400
+        }, 400)
     except Exception as e:
         db.session.rollback()
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': f'Failed to save test results: {str(e)}'
-        }), 500
+        }, 500)
+
+
+def _save_test_results_batch(items):
+    """Validate and bulk insert a list of test results with a single commit"""
+    rows = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return unicode_safe_jsonify({
+                'success': False,
+                'error': f'Result {index}: Invalid data format'
+            }, 400)
+        
+        is_valid, error, accuracy = validate_test_result_data(item)
+        if not is_valid:
+            return unicode_safe_jsonify({
+                'success': False,
+                'error': f'Result {index}: {error}'
+            }, 400)
+        
+        rows.append({
+            'outcome': item.get('outcome'),
+            'accuracy': accuracy,
+            'observation': item.get('observation'),
+            'tested_by': item.get('testedBy'),
+            'text_to_translate': item.get('sourceText'),
+            'translated_text': item.get('translatedText'),
+            'source_language': item.get('sourceLanguage', 'auto'),
+            'target_language': item.get('targetLanguage'),
+            'session_id': item['sessionId'] if 'sessionId' in item else str(uuid.uuid4())
+        })
+    
+    # Save to database
+    db.session.bulk_insert_mappings(TestResult, rows)
+    db.session.commit()
+    
+    return unicode_safe_jsonify({
+        'success': True,
+        'message': f'{len(rows)} test results saved successfully to database',
+        'saved_count': len(rows)
+    })
 
 
 @api_bp.route('/test-results', methods=['GET'])
@@ -169,98 +222,167 @@ def get_test_results():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         outcome_filter = request.args.get('outcome', None)
+        no_count = request.args.get('no_count', '').lower() in ('1', 'true', 'yes')
         
-        # Build query
-        query = TestResult.query
+        # Read-only listing uses Core selects - no ORM instances are built
+        stmt = select(*TestResult.__table__.columns)
+        count_stmt = select(func.count()).select_from(TestResult.__table__)
         
         # Apply filters
         if outcome_filter:
-            query = query.filter(TestResult.outcome == outcome_filter)
+            stmt = stmt.where(TestResult.outcome == outcome_filter)
+            count_stmt = count_stmt.where(TestResult.outcome == outcome_filter)
         
-        # Order by most recent first
-        query = query.order_by(TestResult.created_at.desc())
+        if no_count:
+            return _get_test_results_keyset(stmt, per_page, request.args.get('cursor'))
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginate results, most recent first
+        page = max(page, 1)
+        per_page = max(per_page, 1)
+        total = db.session.execute(count_stmt).scalar()
+        pages = math.ceil(total / per_page)
+        
+        stmt = stmt.order_by(TestResult.created_at.desc()).limit(per_page).offset((page - 1) * per_page)
+        rows = db.session.execute(stmt).mappings().all()
         
         # Convert to dictionaries
-        results = [result.to_dict() for result in pagination.items]
+        results = [TestResult.row_to_dict(row) for row in rows]
         
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': True,
             'data': results,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
+                'total': total,
+                'pages': pages,
+                'has_next': page < pages,
+                'has_prev': page > 1
             }
         })
         
+    except ValueError as e:
+        return unicode_safe_jsonify({
+            'success': False,
+            'error': f'Invalid cursor: {str(e)}'
+        }, 400)
     except Exception as e:
-        return jsonify({
+        return unicode_safe_jsonify({
             'success': False,
             'error': f'Failed to retrieve test results: {str(e)}'
-        }), 500
+        }, 500)
+
+
+def _get_test_results_keyset(stmt, per_page, cursor):
+    """Keyset-paginate test results without issuing a COUNT(*) query.
+    
+    The cursor has the form ``<created_at isoformat>_<id>`` and points at the
+    last row of the previous page.
+    """
+    per_page = max(per_page, 1)
+    
+    if cursor:
+        cursor_created_at, cursor_id = cursor.rsplit('_', 1)
+        cursor_created_at = datetime.fromisoformat(cursor_created_at)
+        if db.engine.dialect.name == 'mssql':
+            # Cast to the column type so the value rounds to the same DATETIME tick as the
+            # stored rows; binding it as datetime2 would miss ties on the boundary timestamp
+            cursor_created_at = cast(literal(cursor_created_at), TestResult.created_at.type)
+        cursor_id = int(cursor_id)
+        stmt = stmt.where(or_(
+            TestResult.created_at < cursor_created_at,
+            and_(TestResult.created_at == cursor_created_at, TestResult.id < cursor_id)
+        ))
+    
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(TestResult.created_at.desc(), TestResult.id.desc()).limit(per_page + 1)
+    rows = db.session.execute(stmt).mappings().all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_next and rows[-1]['created_at']:
+        next_cursor = f"{rows[-1]['created_at'].isoformat()}_{rows[-1]['id']}"
+    
+    return unicode_safe_jsonify({
+        'success': True,
+        'data': [TestResult.row_to_dict(row) for row in rows],
+        'pagination': {
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+    })
+
+
+@functools.lru_cache(maxsize=1)
+def _get_openpyxl():
+    """Import openpyxl lazily, on the first export only"""
+    import openpyxl
+    import openpyxl.utils
+    return openpyxl
+
+
+# Excel export layout: (header, column width)
+EXPORT_COLUMNS = [
+    ('ID', 8),
+    ('Text to Translate', 50),
+    ('Translated Text', 50),
+    ('Source Language', 17),
+    ('Target Language', 17),
+    ('Outcome', 12),
+    ('Observation', 50),
+    ('Accuracy (%)', 14),
+    ('Tested By', 25),
+    ('Date Created', 21),
+    ('Session ID', 38)
+]
 
 
 @api_bp.route('/export-test-results', methods=['GET'])
 def export_test_results():
     """API endpoint to export test results as Excel file"""
     try:
-        import pandas as pd
         from io import BytesIO
+        openpyxl = _get_openpyxl()
+        
+        # Stream results from the database instead of loading them all at once
+        stmt = select(TestResult).order_by(TestResult.created_at.desc()).execution_options(yield_per=1000)
+        results = db.session.execute(stmt).scalars()
         
-        # Get all test results
-        results = TestResult.query.order_by(TestResult.created_at.desc()).all()
+        # Write-only workbook keeps memory flat regardless of row count
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Test Results')
         
-        if not results:
-            return jsonify({'error': 'No test results to export'}), 404
+        # Column widths must be set before the first row is written
+        for index, (_, width) in enumerate(EXPORT_COLUMNS, start=1):
+            worksheet.column_dimensions[openpyxl.utils.get_column_letter(index)].width = width
         
-        # Convert to DataFrame
-        data = []
+        worksheet.append([header for header, _ in EXPORT_COLUMNS])
+        
+        row_count = 0
         for result in results:
-            data.append({
-                'ID': result.id,
-                'Text to Translate': result.text_to_translate,
-                'Translated Text': result.translated_text,
-                'Source Language': result.source_language,
-                'Target Language': result.target_language,
-                'Outcome': result.outcome,
-                'Observation': result.observation,
-                'Accuracy (%)': result.accuracy,
-                'Tested By': result.tested_by,
-                'Date Created': result.created_at.strftime('%Y-%m-%d %H:%M:%S') if result.created_at else '',
-                'Session ID': result.session_id
-            })
+            worksheet.append([
+                result.id,
+                result.text_to_translate,
+                result.translated_text,
+                result.source_language,
+                result.target_language,
+                result.outcome,
+                result.observation,
+                result.accuracy,
+                result.tested_by,
+                result.created_at.strftime('%Y-%m-%d %H:%M:%S') if result.created_at else '',
+                result.session_id
+            ])
+            row_count += 1
         
-        df = pd.DataFrame(data)
+        if not row_count:
+            return unicode_safe_jsonify({'error': 'No test results to export'}, 404)
         
         # Create Excel file in memory
         output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Test Results', index=False)
-            
-            # Auto-adjust column widths
-            worksheet = writer.sheets['Test Results']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
+        workbook.save(output)
         output.seek(0)
         
         return send_file(
@@ -271,29 +393,26 @@ def export_test_results():
         )
         
     except ImportError:
-        return jsonify({'error': 'Pandas and openpyxl libraries are required for Excel export'}), 500
+        return unicode_safe_jsonify({'error': 'openpyxl library is required for Excel export'}, 500)
     except Exception as e:
         print(f"Error exporting test results: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return unicode_safe_jsonify({'error': str(e)}, 500)
 
 
 @api_bp.route('/test-results/<int:result_id>', methods=['DELETE'])
 def delete_test_result(result_id):
     """API endpoint to delete a specific test result"""
     try:
-        # Find the test result
-        result = TestResult.query.get(result_id)
-        
-        if not result:
-            return jsonify({'error': 'Test result not found'}), 404
-        
-        # Delete the test result
-        db.session.delete(result)
+        # Delete the test result in a single round-trip
+        result = db.session.execute(db.delete(TestResult).where(TestResult.id == result_id))
         db.session.commit()
         
-        return jsonify({'message': 'Test result deleted successfully'})
+        if result.rowcount == 0:
+            return unicode_safe_jsonify({'error': 'Test result not found'}, 404)
+        
+        return unicode_safe_jsonify({'message': 'Test result deleted successfully'})
         
     except Exception as e:
         db.session.rollback()
         print(f"Error deleting test result: {str(e)}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return unicode_safe_jsonify({'error': str(e)}, 500)
\ No newline at end of file
@@ -3,8 +3,8 @@ Main routes for PLM Translator application.
 Handles page rendering and general web routes.
 """
 from flask import Blueprint, render_template
-from services.translator import translator_service
-from models import TestResult
+from sqlalchemy import select
+from models import db, TestResult
 
 main_bp = Blueprint('main', __name__)
 
@@ -12,6 +12,8 @@ main_bp = Blueprint('main', __name__)
 @main_bp.route('/')
 def index():
     """Main translator page"""
+    from services.translator import translator_service
+    
     languages = translator_service.get_supported_languages()
     return render_template('translator.html', languages=languages)
 
@@ -20,7 +22,9 @@ def index():
 def view_test_results():
     """Simple page to view test results"""
     try:
-        results = TestResult.query.order_by(TestResult.created_at.desc()).limit(20).all()
+        # Served by ix_test_results_created_at; emitted as TOP 20 on SQL Server
+        stmt = select(TestResult).order_by(TestResult.created_at.desc()).limit(20)
+        results = db.session.execute(stmt).scalars().all()
         return render_template('test_results.html', results=results)
     except Exception as e:
         return f"Error loading test results: {str(e)}", 500
@@ -2,87 +2,277 @@
 Azure Translator service module.
 Handles Microsoft Azure Translator API calls and language operations.
 """
+import os
+import json
+import time
+import queue
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import AzureTranslatorConfig
 
+try:
+    import fcntl
+except ImportError:  # Windows - refreshes are simply not serialized across processes
+    fcntl = None
+
+# Snapshot translator settings once at import time
+TRANSLATOR_KEY = AzureTranslatorConfig.TRANSLATOR_KEY
+TRANSLATOR_ENDPOINT = AzureTranslatorConfig.TRANSLATOR_ENDPOINT
+TRANSLATOR_REGION = AzureTranslatorConfig.TRANSLATOR_REGION
+TRANSLATOR_CONFIGURED = AzureTranslatorConfig.is_configured()
+
+# HTTP settings shared by all translator calls
+TRANSLATE_CONNECT_TIMEOUT = 10
+TRANSLATE_READ_TIMEOUT = 30
+LANGUAGES_TIMEOUT = 10
+HTTP_RETRIES = 2
+HTTP_BACKOFF_FACTOR = 0.2
+RETRY_AFTER_MAX = 10  # Cap on how long a 429 Retry-After header may delay a retry
+
+# Worst-case time for one translate call: every attempt hits both the connect and
+# read timeouts, and every retry sleeps for the longer of its backoff and the
+# capped Retry-After. (The read timeout applies per socket read, but translate
+# responses are small enough to arrive in a single read.)
+TRANSLATE_MAX_DURATION = (
+    (HTTP_RETRIES + 1) * (TRANSLATE_CONNECT_TIMEOUT + TRANSLATE_READ_TIMEOUT)
+    + HTTP_RETRIES * RETRY_AFTER_MAX
+    + sum(HTTP_BACKOFF_FACTOR * (2 ** attempt) for attempt in range(HTTP_RETRIES))
+)
+
+LANGUAGES_URL = "https://api.cognitive.microsofttranslator.com/languages?api-version=3.0&scope=translation"
+
+# On-disk languages cache shared by all workers
+LANGUAGES_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'languages.json')
+LANGUAGES_CACHE_MAX_AGE = 24 * 60 * 60  # Refresh the on-disk cache once a day
+LANGUAGES_RETRY_INTERVAL = 5 * 60  # Minimum wait between refresh attempts after a failure
+
+# First entry of every languages list shown in the target language dropdown
+LANGUAGE_PLACEHOLDER = {"key": "", "text": "Select Target Language"}
+
+# Fallback languages list when the API is unavailable
+FALLBACK_LANGUAGES = (
+    LANGUAGE_PLACEHOLDER,
+    {"key": "ar", "text": "Arabic"},
+    {"key": "zh", "text": "Chinese (Simplified)"},
+    {"key": "da", "text": "Danish"},
+    {"key": "nl", "text": "Dutch"},
+    {"key": "fi", "text": "Finnish"},
+    {"key": "fr", "text": "French"},
+    {"key": "de", "text": "German"},
+    {"key": "hi", "text": "Hindi"},
+    {"key": "it", "text": "Italian"},
+    {"key": "ja", "text": "Japanese"},
+    {"key": "ko", "text": "Korean"},
+    {"key": "no", "text": "Norwegian"},
+    {"key": "pl", "text": "Polish"},
+    {"key": "pt", "text": "Portuguese"},
+    {"key": "ru", "text": "Russian"},
+    {"key": "es", "text": "Spanish"},
+    {"key": "sv", "text": "Swedish"},
+    {"key": "th", "text": "Thai"},
+    {"key": "tr", "text": "Turkish"}
+)
+
+
+@contextlib.contextmanager
+def _languages_file_lock():
+    """Serialize language refreshes across worker processes with an exclusive file lock"""
+    try:
+        os.makedirs(os.path.dirname(LANGUAGES_CACHE_FILE), exist_ok=True)
+        lock_file = open(f"{LANGUAGES_CACHE_FILE}.lock", 'a')
+    except OSError:
+        yield
+        return
+    
+    try:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+    finally:
+        lock_file.close()  # Closing the file releases the lock
+
+
+class _CappedRetry(Retry):
+    """Retry policy that honours Retry-After but never sleeps longer than RETRY_AFTER_MAX"""
+    
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RETRY_AFTER_MAX)
+
 
 class TranslatorService:
     """Service class to handle Microsoft Azure Translator API calls"""
     
     def __init__(self):
-        self.subscription_key = AzureTranslatorConfig.TRANSLATOR_KEY
-        self.endpoint = AzureTranslatorConfig.TRANSLATOR_ENDPOINT
-        self.region = AzureTranslatorConfig.TRANSLATOR_REGION
+        self.subscription_key = TRANSLATOR_KEY
+        self.endpoint = TRANSLATOR_ENDPOINT
+        self.region = TRANSLATOR_REGION
         self.languages_cache = None
+        self._languages_cache_time = 0
+        self._last_refresh_attempt = 0
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._session = self._create_session()
+    
+    def _create_session(self):
+        """Create a keep-alive HTTP session shared by all translator calls"""
+        session = requests.Session()
+        retries = _CappedRetry(
+            total=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF_FACTOR,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(['GET', 'POST'])  # Translate requests are safe to retry
+        )
+        session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retries))
+        
+        session.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        })
+        if TRANSLATOR_CONFIGURED:
+            session.headers.update({
+                'Ocp-Apim-Subscription-Key': self.subscription_key,
+                'Ocp-Apim-Subscription-Region': self.region
+            })
+        return session
+    
+    def load_languages_cache(self):
+        """Load languages from the on-disk cache, refreshing it in the background if stale"""
+        try:
+            with open(LANGUAGES_CACHE_FILE, 'r', encoding='utf-8') as f:
+                self.languages_cache = tuple(json.load(f))
+            self._languages_cache_time = os.path.getmtime(LANGUAGES_CACHE_FILE)
+        except (OSError, ValueError):
+            # No usable cache file yet - seed it with the fallback list marked as
+            # expired, so boot never blocks on the API and the real list is fetched
+            # in the background
+            self.languages_cache = self._get_fallback_languages()
+            self._languages_cache_time = 0
+            self._write_languages_cache(self.languages_cache, mtime=0)
+        
+        if self._is_languages_cache_stale():
+            self._start_background_refresh()
+        return self.languages_cache
     
     def get_supported_languages(self):
         """Get list of supported languages from Microsoft Translator API"""
         if self.languages_cache:
+            # Serve the cached list immediately, revalidating in the background when stale
+            if self._is_languages_cache_stale():
+                self._start_background_refresh()
             return self.languages_cache
-            
+        
+        # Not pre-warmed - load from disk (or the fallback list) without blocking on the API
+        return self.load_languages_cache()
+    
+    def _is_languages_cache_stale(self):
+        """Check whether the cached languages list has expired and a refresh may be attempted"""
+        now = time.time()
+        return (now - self._languages_cache_time > LANGUAGES_CACHE_MAX_AGE
+                and now - self._last_refresh_attempt > LANGUAGES_RETRY_INTERVAL)
+    
+    def _start_background_refresh(self):
+        """Refresh the languages cache on a background thread"""
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        thread = threading.Thread(target=self._background_refresh, daemon=True)
+        thread.start()
+    
+    def _background_refresh(self):
+        """Run a refresh and release the guard taken by _start_background_refresh"""
         try:
-            url = "https://api.cognitive.microsofttranslator.com/languages?api-version=3.0&scope=translation"
-            headers = {
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            self._refresh_languages()
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+    
+    def _refresh_languages(self):
+        """Fetch languages from the API and update the in-memory and on-disk caches"""
+        self._last_refresh_attempt = time.time()
+        with _languages_file_lock():
+            # Another worker may already have refreshed the shared file
+            if self._reload_languages_file():
+                return True
             
-            data = response.json()
+            try:
+                languages = self._fetch_languages()
+            except Exception as e:
+                print(f"Error loading languages from API: {e}")
+                return False
             
-            if 'translation' in data:
-                # Convert to list format for frontend
-                languages = [{"key": "", "text": "Select Target Language"}]
-                for key, value in data['translation'].items():
-                    languages.append({
-                        "key": key,
-                        "text": value.get('name', key)
-                    })
-                # Sort by name
-                languages[1:] = sorted(languages[1:], key=lambda x: x['text'])
-                self.languages_cache = languages
-                return languages
-            else:
-                raise Exception("Invalid API response structure")
-                
-        except Exception as e:
-            print(f"Error loading languages from API: {e}")
-            # Return fallback languages
-            return self._get_fallback_languages()
+            self.languages_cache = languages
+            self._languages_cache_time = time.time()
+            self._write_languages_cache(languages)
+            return True
+    
+    def _reload_languages_file(self):
+        """Load the on-disk cache if it is newer than ours and still fresh"""
+        try:
+            mtime = os.path.getmtime(LANGUAGES_CACHE_FILE)
+            if mtime <= self._languages_cache_time or time.time() - mtime > LANGUAGES_CACHE_MAX_AGE:
+                return False
+            with open(LANGUAGES_CACHE_FILE, 'r', encoding='utf-8') as f:
+                self.languages_cache = tuple(json.load(f))
+        except (OSError, ValueError):
+            return False
+        
+        self._languages_cache_time = mtime
+        return True
+    
+    def _fetch_languages(self):
+        """Fetch the supported languages list from Microsoft Translator API"""
+        response = self._session.get(LANGUAGES_URL, timeout=LANGUAGES_TIMEOUT)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        if 'translation' not in data:
+            raise Exception("Invalid API response structure")
+        
+        # Convert to list format for frontend, sorted by name once and frozen
+        languages = sorted(
+            ({"key": key, "text": value.get('name', key)} for key, value in data['translation'].items()),
+            key=lambda x: x['text']
+        )
+        return (LANGUAGE_PLACEHOLDER, *languages)
+    
+    def _write_languages_cache(self, languages, mtime=None):
+        """Atomically write the languages list to the on-disk cache"""
+        try:
+            os.makedirs(os.path.dirname(LANGUAGES_CACHE_FILE), exist_ok=True)
+            tmp_path = f"{LANGUAGES_CACHE_FILE}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(languages, f, ensure_ascii=False)
+            if mtime is not None:
+                os.utime(tmp_path, (mtime, mtime))
+            os.replace(tmp_path, LANGUAGES_CACHE_FILE)
+        except OSError as e:
+            print(f"Error writing languages cache: {e}")
     
     def _get_fallback_languages(self):
         """Fallback languages list when API is unavailable"""
-        return [
-            {"key": "", "text": "Select Target Language"},
-            {"key": "ar", "text": "Arabic"},
-            {"key": "zh", "text": "Chinese (Simplified)"},
-            {"key": "da", "text": "Danish"},
-            {"key": "nl", "text": "Dutch"},
-            {"key": "fi", "text": "Finnish"},
-            {"key": "fr", "text": "French"},
-            {"key": "de", "text": "German"},
-            {"key": "hi", "text": "Hindi"},
-            {"key": "it", "text": "Italian"},
-            {"key": "ja", "text": "Japanese"},
-            {"key": "ko", "text": "Korean"},
-            {"key": "no", "text": "Norwegian"},
-            {"key": "pl", "text": "Polish"},
-            {"key": "pt", "text": "Portuguese"},
-            {"key": "ru", "text": "Russian"},
-            {"key": "es", "text": "Spanish"},
-            {"key": "sv", "text": "Swedish"},
-            {"key": "th", "text": "Thai"},
-            {"key": "tr", "text": "Turkish"}
-        ]
+        return FALLBACK_LANGUAGES
     
     def translate_text(self, text, target_language):
         """Translate text using Azure Translator API"""
-        if not AzureTranslatorConfig.is_configured():
-            return {
+        return self.translate_batch([text], target_language)[0]
+    
+    def translate_batch(self, texts, target_language):
+        """Translate several texts to one target language in a single API call"""
+        if not TRANSLATOR_CONFIGURED:
+            return [{
                 'success': False,
                 'error': 'Azure Translator service is not configured. Please set the required environment variables.'
-            }
+            } for _ in texts]
         
         try:
             url = f"{self.endpoint}/translator/text/v3.0/translate"
@@ -91,46 +281,174 @@ class TranslatorService:
                 'to': target_language
             }
             
-            headers = {
-                'Ocp-Apim-Subscription-Key': self.subscription_key,
-                'Ocp-Apim-Subscription-Region': self.region,
-                'Content-Type': 'application/json'
-            }
-            
-            body = [{'text': text}]
+            body = [{'text': text} for text in texts]
             
-            response = requests.post(url, params=params, headers=headers, json=body, timeout=30)
+            response = self._session.post(url, params=params, json=body, timeout=(TRANSLATE_CONNECT_TIMEOUT, TRANSLATE_READ_TIMEOUT))
             response.raise_for_status()
             
             result = response.json()
             
-            if result and len(result) > 0 and 'translations' in result[0]:
-                translated_text = result[0]['translations'][0]['text']
-                return {
+            if result and len(result) == len(texts) and all('translations' in item for item in result):
+                return [{
                     'success': True,
-                    'translated_text': translated_text,
-                    'source_language': result[0].get('detectedLanguage', {}).get('language', 'auto'),
+                    'translated_text': item['translations'][0]['text'],
+                    'source_language': item.get('detectedLanguage', {}).get('language', 'auto'),
                     'target_language': target_language
-                }
+                } for item in result]
             else:
                 raise Exception("Invalid translation response")
                 
         except requests.exceptions.Timeout:
-            return {
+            error = {
                 'success': False,
                 'error': 'Translation request timed out. Please try again.'
             }
         except requests.exceptions.RequestException as e:
-            return {
+            error = {
                 'success': False,
                 'error': f'Translation service error: {str(e)}'
             }
         except Exception as e:
-            return {
+            error = {
                 'success': False,
                 'error': f'Translation failed: {str(e)}'
             }
+        return [dict(error) for _ in texts]
+
+
+class _PendingTranslation:
+    """A single translation waiting to be sent as part of a batch"""
+    
+    __slots__ = ('text', 'target_language', 'event', 'result')
+    
+    def __init__(self, text, target_language):
+        self.text = text
+        self.target_language = target_language
+        self.event = threading.Event()
+        self.result = None
+
+
+class BatchingTranslator:
+    """Coalesces concurrent translate requests into batched Azure Translator calls.
+    
+    Requests are queued and collected by a background thread, grouped by
+    target language (each batch shares one ``to=`` parameter) and sent as a
+    single POST. While other translations are in flight upstream, the
+    collector lingers up to ``max_wait`` seconds (or ``max_batch_size``
+    items) so concurrent requests share a call; when nothing is in flight a
+    request is sent as soon as the queue is empty. Each caller blocks on its
+    own event until its result is ready.
+    
+    Coalescing needs concurrent requests in the same process, so deploy with
+    a threaded gunicorn worker (see ``startup.sh``).
+    """
+    
+    MAX_BATCH_CHARS = 50000  # Azure Translator request body character limit
+    
+    def __init__(self, service, max_batch_size=50, max_wait=0.01, result_timeout=TRANSLATE_MAX_DURATION + 5):
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue()
+        self._executor = None
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._in_flight = 0  # Translations dispatched upstream and not yet answered
+        self._in_flight_lock = threading.Lock()
+    
+    def translate_text(self, text, target_language):
+        """Translate text, sharing the upstream request with concurrent callers"""
+        self._ensure_started()
+        
+        pending = _PendingTranslation(text, target_language)
+        self._queue.put(pending)
+        
+        if not pending.event.wait(self.result_timeout):
+            return {
+                'success': False,
+                'error': 'Translation request timed out. Please try again.'
+            }
+        return pending.result
+    
+    def _ensure_started(self):
+        """Start the collector thread lazily so it is created after a worker fork"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='translator-batch')
+                self._worker = threading.Thread(target=self._run, name='translator-batcher', daemon=True)
+                self._worker.start()
+    
+    def _run(self):
+        """Collect queued requests into batches and dispatch them"""
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            
+            while len(pending) < self.max_batch_size:
+                try:
+                    pending.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                
+                # Queue is drained - only linger while other translations are in flight,
+                # since that is when more requests are likely to arrive
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (len(pending) == 1 and not self._in_flight):
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            for batch in self._group_batches(pending):
+                with self._in_flight_lock:
+                    self._in_flight += len(batch)
+                self._executor.submit(self._dispatch, batch)
+    
+    def _group_batches(self, pending):
+        """Split pending requests into per-language batches within the API size limits"""
+        by_language = {}
+        for item in pending:
+            by_language.setdefault(item.target_language, []).append(item)
+        
+        for items in by_language.values():
+            batch = []
+            batch_chars = 0
+            for item in items:
+                if batch and batch_chars + len(item.text) > self.MAX_BATCH_CHARS:
+                    yield batch
+                    batch = []
+                    batch_chars = 0
+                batch.append(item)
+                batch_chars += len(item.text)
+            if batch:
+                yield batch
+    
+    def _dispatch(self, batch):
+        """Send one batch upstream and hand each result back to its caller"""
+        try:
+            results = self.service.translate_batch([item.text for item in batch], batch[0].target_language)
+        except Exception as e:
+            results = [{
+                'success': False,
+                'error': f'Translation failed: {str(e)}'
+            } for _ in batch]
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= len(batch)
+        
+        for item, result in zip(batch, results):
+            item.result = result
+            item.event.set()
 
 
 # Global translator service instance
-translator_service = TranslatorService()
\ No newline at end of file
+translator_service = TranslatorService()
+
+# Global batching front-end used by the translate endpoint
+batching_translator = BatchingTranslator(translator_service)
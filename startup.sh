@@ -1 +1 @@
-gunicorn run:app --bind=0.0.0.0 --timeout 600
\ No newline at end of file
+gunicorn run:app --bind=0.0.0.0 --timeout 600 --worker-class gthread --threads 8
\ No newline at end of file
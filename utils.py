@@ -3,20 +3,22 @@ Utility functions for PLM Translator application.
 Contains helper functions and common utilities.
 """
 import os
+import functools
 import getpass
 import platform
-from flask import jsonify, make_response
+import orjson
+from flask import Response
 
 
 def unicode_safe_jsonify(data, status_code=200):
     """Create a JSON response that properly handles Unicode characters"""
-    response = make_response(jsonify(data), status_code)
-    response.headers['Content-Type'] = 'application/json; charset=utf-8'
-    return response
+    body = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC)
+    return Response(body, status=status_code, content_type='application/json; charset=utf-8')
 
 
+@functools.lru_cache(maxsize=1)
 def get_user_info():
-    """Get current user information for the application"""
+    """Get current user information for the application (cached for the process lifetime)"""
     try:
         # Get system user information
         current_user = getpass.getuser()
@@ -96,8 +98,9 @@ def validate_test_result_data(data):
     return True, None, accuracy
 
 
+@functools.lru_cache(maxsize=1)
 def get_environment_type():
-    """Determine the current environment type"""
+    """Determine the current environment type (cached for the process lifetime)"""
     if os.environ.get('WEBSITE_SITE_NAME'):
         return 'production'
     elif os.environ.get('FLASK_ENV') == 'development':